@@ -1,19 +1,182 @@
 import os
-import gc
 import sys
+import math
+import h5py
 import emcee
 import datetime
 import json
 import numpy as np
-import matplotlib.pyplot as plt
-from multiprocessing import get_context
-from pySODM.optimization.visualization import traceplot, autocorrelation_plot
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+# orjson serializes float-heavy payloads in C and accepts numpy arrays directly; fall back to the stdlib if unavailable
+try:
+    import orjson
+except ImportError:
+    orjson = None
+from multiprocessing import get_context, get_all_start_methods, shared_memory
+from concurrent.futures import ThreadPoolExecutor
+from pySODM.optimization._acor import integrated_time
 
 abs_dir = os.path.dirname(__file__)
 
+# Per-worker state of the shared-memory pool used by `run_EnsembleSampler`. Filled once per worker by `_init_worker`.
+_WORKER_STATE = {}
+
+# Cache of numba-compiled log-likelihood kernels, keyed on the function object
+_JIT_CACHE = {}
+
+def jit_loglike(func):
+    """Compile a user-supplied log-likelihood kernel with `numba` for per-walker evaluation.
+
+    The likelihood evaluation dominates the cost of every MCMC iteration; compiling the kernel removes the Python
+    interpreter from the inner loop. The compiled kernel is cached in a module-level dictionary keyed on the
+    function object, so repeated calls do not trigger recompilation. Requires the optional dependency `numba`.
+
+    Parameters
+    ----------
+    func: callable function
+        Log-likelihood kernel operating on numpy arrays and scalars only (no pandas/xarray), so it can be compiled in nopython mode.
+
+    Returns
+    -------
+    jitted_func: callable function
+        `func` compiled with `numba.njit(cache=True, fastmath=True, boundscheck=False)`. Pass it (or an objective function built on it) to `run_EnsembleSampler` as `objective_function`.
+    """
+    try:
+        import numba
+    except ImportError:
+        raise ImportError(
+            "The optional dependency 'numba' is required to use `jit_loglike`. Install it or pass the kernel to `run_EnsembleSampler` uncompiled."
+        )
+    if func not in _JIT_CACHE:
+        try:
+            _JIT_CACHE[func] = numba.njit(cache=True, fastmath=True, boundscheck=False)(func)
+        except RuntimeError:
+            # On-disk caching is unavailable for interactively-defined functions (f.i. in a notebook)
+            _JIT_CACHE[func] = numba.njit(fastmath=True, boundscheck=False)(func)
+    return _JIT_CACHE[func]
+
+def _init_worker(objective_function, objective_function_args, objective_function_kwargs, shm_name, shape, dtype):
+    """Initialize a worker process: attach to the shared-memory block holding the walker positions and store the objective function"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _WORKER_STATE['shm'] = shm
+    _WORKER_STATE['positions'] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    _WORKER_STATE['objective_function'] = objective_function
+    _WORKER_STATE['args'] = objective_function_args if objective_function_args else ()
+    _WORKER_STATE['kwargs'] = objective_function_kwargs if objective_function_kwargs else {}
+
+def _eval_idx(i):
+    """Evaluate the objective function on the i-th walker position in the shared-memory block"""
+    return _WORKER_STATE['objective_function'](_WORKER_STATE['positions'][i], *_WORKER_STATE['args'], **_WORKER_STATE['kwargs'])
+
+class _ChunkedHDFBackend(emcee.backends.HDFBackend):
+    """An `emcee.backends.HDFBackend` whose chain is stored in HDF5 chunks of `chunk_rows` iterations.
+
+    h5py's automatic chunking can yield tiny chunks for a dataset that is appended to step-by-step; sizing one
+    chunk to a full checkpoint's worth of iterations lands one checkpoint's writes in a single chunk. Compression
+    is disabled explicitly: float64 chains barely compress but the filter costs CPU on every append.
+    """
+
+    def __init__(self, filename, chunk_rows=10, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.chunk_rows = chunk_rows
+
+    def reset(self, nwalkers, ndim):
+        super().reset(nwalkers, ndim)
+        # Recreate the (still empty) chain and log_prob datasets with the tuned chunk shape
+        with self.open("a") as f:
+            g = f[self.name]
+            del g["chain"], g["log_prob"]
+            g.create_dataset("chain", (0, nwalkers, ndim), maxshape=(None, nwalkers, ndim),
+                             dtype=self.dtype, chunks=(self.chunk_rows, nwalkers, ndim), compression=None)
+            g.create_dataset("log_prob", (0, nwalkers), maxshape=(None, nwalkers),
+                             dtype=self.dtype, chunks=(self.chunk_rows, nwalkers), compression=None)
+
+class _SharedMemoryPool:
+    """A drop-in replacement for `multiprocessing.Pool` in `emcee.EnsembleSampler`.
+
+    The objective function (and its arguments) is pickled only once per worker instead of once per likelihood evaluation,
+    and walker positions are passed to the workers through a `multiprocessing.shared_memory.SharedMemory` block so that
+    only an integer index crosses the pipe on every evaluation.
+    """
+
+    def __init__(self, objective_function, objective_function_args, objective_function_kwargs, nwalkers, ndim, processes):
+        self.shm = shared_memory.SharedMemory(create=True, size=nwalkers*ndim*np.dtype(np.float64).itemsize)
+        self.positions = np.ndarray((nwalkers, ndim), dtype=np.float64, buffer=self.shm.buf)
+        # Prefer 'fork' where available to skip the re-import cost of 'spawn'
+        context = get_context("fork") if "fork" in get_all_start_methods() else get_context("spawn")
+        self.pool = context.Pool(processes=processes, initializer=_init_worker,
+                                 initargs=(objective_function, objective_function_args, objective_function_kwargs,
+                                           self.shm.name, (nwalkers, ndim), np.float64))
+
+    def map(self, func, iterable):
+        # `func` is emcee's pickling wrapper around the objective function; it is ignored on purpose because
+        # every worker already holds the objective function in `_WORKER_STATE`
+        positions = np.asarray(list(iterable), dtype=np.float64)
+        n = len(positions)
+        self.positions[:n] = positions
+        return self.pool.map(_eval_idx, range(n))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+        self.shm.close()
+        self.shm.unlink()
+
+def _warn_render_failure(future):
+    """Report errors of the background plotting thread of `run_EnsembleSampler`: exceptions in a discarded future are otherwise silent"""
+    exception = future.exception()
+    if exception:
+        print(f'Warning: could not render the diagnostic figures: {repr(exception)}')
+        sys.stdout.flush()
+
+def _render_diagnostic_figures(chain, thin, labels, fig_path, identifier, run_date):
+    """Render the autocorrelation and trace diagnostics; runs on the background plotting thread of `run_EnsembleSampler`.
+
+    The figures are built directly on `matplotlib.figure.Figure` with an Agg canvas, bypassing pyplot: the global
+    pyplot figure manager must not be touched from a non-main thread on interactive backends.
+    """
+    nsamples, nwalkers, ndim = chain.shape
+    # Autocorrelation plot: evolution of the integrated autocorrelation time as the chain grows (mirrors `visualization.autocorrelation_plot`)
+    step_autocorr = math.ceil(nsamples/100)
+    tau_vect = [integrated_time(chain[:i]) for i in range(step_autocorr, nsamples, step_autocorr)]
+    if tau_vect:
+        n = step_autocorr * np.arange(1, len(tau_vect) + 1)
+        fig = Figure(figsize=(10,4))
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
+        ax.plot(n, np.array(tau_vect))
+        ax.plot(n, n/50, "--k")
+        ax.set_xlim(0, n.max())
+        ax.set_ylabel(r"$\hat{\tau}$")
+        ax.grid(False)
+        ax.legend(labels)
+        fig.savefig(os.path.join(fig_path, 'autocorrelation', identifier+'_AUTOCORR_'+run_date+'.pdf'),
+                    dpi=600, bbox_inches='tight', orientation='portrait')
+    # Traceplot (mirrors `visualization.traceplot`); thinned because it cannot visually resolve more than ~2000 iterations anyway
+    samples = chain[::thin]
+    fig = Figure(figsize=(10, ndim*7/3))
+    FigureCanvasAgg(fig)
+    axes = np.atleast_1d(fig.subplots(ndim))
+    for i in range(ndim):
+        axes[i].plot(samples[:, :, i], linewidth=2, color='red', alpha=0.15)
+        axes[i].set_xlim(0, samples.shape[0])
+        axes[i].set_ylabel(labels[i])
+        axes[i].grid(False)
+    axes[-1].set_xlabel("step number")
+    fig.savefig(os.path.join(fig_path, 'traceplots', identifier+'_TRACE_'+run_date+'.pdf'),
+                dpi=600, bbox_inches='tight', orientation='portrait')
+
 def run_EnsembleSampler(pos, max_n, identifier, objective_function, objective_function_args=None, objective_function_kwargs=None,
                         moves=[(emcee.moves.DEMove(), 0.5),(emcee.moves.KDEMove(bw_method='scott'), 0.5)],
-                        fig_path=None, samples_path=None, print_n=10, backend=None, processes=1, progress=True, settings_dict={}):
+                        fig_path=None, samples_path=None, print_n=10, backend=None, processes=1, progress=True, settings_dict={},
+                        vectorize=False):
     """Wrapper function to setup an `emcee.EnsembleSampler` and handle all backend-related tasks.
     
     Parameters:
@@ -31,13 +194,15 @@ def run_EnsembleSampler(pos, max_n, identifier, objective_function, objective_fu
         objective_function_kwargs: dict
             Keyworded arguments of the objective function. If using `log_posterior_probability` as objective function, use default `None`.
         samples_path: str
-            Location where the `.hdf5` backend and settings `.json` should be saved.
+            Location where the `.hdf5` backend should be saved.
         print_n: int
-            Print autocorrelation and trace plots every `print_n` iterations.
+            Check convergence every `print_n` iterations. The autocorrelation and trace plots are updated every `10*print_n` iterations, and once more when sampling ends.
         processes: int
             Number of cores to use.
+        vectorize: bool
+            If True, the objective function is called once per iteration with a 2D array of all walker positions (shape: nwalkers x ndim) and must return a 1D array of log-probabilities. No parallel pool is used. Recommended when the objective function is implemented with broadcasted numpy operations.
         settings_dict: dict
-            Dictionary containing calibration settings or other usefull settings for long-term storage. Saved in `.json` format. Appended to the samples dictionary generated by `emcee_sampler_to_dictionary()`. 
+            Dictionary containing calibration settings or other usefull settings for long-term storage. Stored as an attribute of the `.hdf5` backend. Appended to the samples dictionary generated by `emcee_sampler_to_dictionary()`. 
     
     Hyperparameters:
     ----------------
@@ -57,43 +222,38 @@ def run_EnsembleSampler(pos, max_n, identifier, objective_function, objective_fu
     """
 
     # Set default fig_path/samples_path as same directory as calibration script
-    if not fig_path:
-        fig_path = os.getcwd()
-    else:
-        fig_path = os.path.join(os.getcwd(), fig_path)
-        # If it doesn't exist make it
-        if not os.path.exists(fig_path):
-            os.makedirs(fig_path)
-    if not samples_path:
-        samples_path = os.getcwd()
-    else:
-        samples_path = os.path.join(os.getcwd(), samples_path)
-        # If it doesn't exist make it
-        if not os.path.exists(samples_path):
-            os.makedirs(samples_path)
-    # Check if the fig_path/autocorrelation and fig_path/traceplots exist and if not make them
-    for directory in [fig_path+"/autocorrelation/", fig_path+"/traceplots/"]:
-        if not os.path.exists(directory):
-            os.makedirs(directory)
+    fig_path = os.path.join(os.getcwd(), fig_path) if fig_path else os.getcwd()
+    samples_path = os.path.join(os.getcwd(), samples_path) if samples_path else os.getcwd()
+    # Make all output directories (if they don't exist yet)
+    for directory in (fig_path, samples_path, os.path.join(fig_path, "autocorrelation"), os.path.join(fig_path, "traceplots")):
+        os.makedirs(directory, exist_ok=True)
     # Determine current date
     run_date = str(datetime.date.today())
     # By default, put the calibrated model parameters shapes in the settings dictionary so we can retrieve their sizes later
     settings_dict.update({'calibrated_parameters_shapes': objective_function.parameter_shapes})
-    # Save setings dictionary to samples_path
-    with open(samples_path+'/'+str(identifier)+'_SETTINGS_'+run_date+'.json', 'w') as file:
-        json.dump(settings_dict, file)
     # Derive nwalkers, ndim from shape of pos
     nwalkers, ndim = pos.shape
     # By default: set up a fresh hdf5 backend in samples_path
     if not backend:
-        filename = '/'+str(identifier)+'_BACKEND_'+run_date+'.hdf5'
-        backend = emcee.backends.HDFBackend(samples_path+filename)
+        backend = _ChunkedHDFBackend(os.path.join(samples_path, str(identifier)+'_BACKEND_'+run_date+'.hdf5'), chunk_rows=print_n)
         backend.reset(nwalkers, ndim)
-    # If user provides an existing backend: continue sampling 
+    # If user provides an existing backend: continue sampling from the last iteration only (reading the full chain just to take the last slice is needless I/O)
     else:
-        pos = backend.get_chain(discard=0, thin=1, flat=False)[-1, ...]
+        pos = backend.get_last_sample().coords
+    # Store the settings as an attribute on the backend file: written once, read back without a filesystem round-trip
+    with h5py.File(backend.filename, 'a') as f:
+        f.attrs['settings_json'] = json.dumps(settings_dict)
     # This will be useful to testing convergence
-    old_tau = np.inf
+    old_tau = np.full(ndim, np.inf)
+    # Keep an in-memory copy of the (append-only) chain so the diagnostics don't re-read the growing HDF5 chain on every checkpoint.
+    # Capped at 50000 iterations (plenty for convergence testing); beyond that the diagnostics fall back to reading from the backend.
+    n_previous = backend.iteration
+    if n_previous + max_n <= 50000:
+        chain_mem = np.empty((n_previous + max_n, nwalkers, ndim), dtype=np.float64)
+        if n_previous:
+            chain_mem[:n_previous] = backend.get_chain()
+    else:
+        chain_mem = None
 
     # Start calibration
     print(f'\nMarkov-Chain Monte-Carlo sampling')
@@ -101,10 +261,18 @@ def run_EnsembleSampler(pos, max_n, identifier, objective_function, objective_fu
     print(f'Using {processes} cores for {ndim} parameters, in {nwalkers} chains\n')
     sys.stdout.flush()
 
-    with get_context("spawn").Pool(processes=processes) as pool:
-        sampler = emcee.EnsembleSampler(nwalkers, ndim, objective_function, backend=backend, pool=pool,
+    # When the objective function handles all walkers at once there is nothing to parallelize over, and with a
+    # single process a worker pool only adds IPC latency: evaluate in-process instead
+    pool = None if (vectorize or processes == 1) else _SharedMemoryPool(objective_function, objective_function_args, objective_function_kwargs, nwalkers, ndim, processes)
+    # Rendering the diagnostic figures happens on a background thread so the sampler doesn't stall on matplotlib
+    plot_executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        sampler = emcee.EnsembleSampler(nwalkers, ndim, objective_function, backend=backend, pool=pool, vectorize=vectorize,
                         args=objective_function_args, kwargs=objective_function_kwargs, moves=moves)
         for sample in sampler.sample(pos, iterations=max_n, progress=progress, store=True, tune=False):
+            # Fill the in-memory chain copy
+            if chain_mem is not None:
+                chain_mem[sampler.iteration-1] = sample.coords
             # Only check convergence every print_n steps
             if sampler.iteration % print_n:
                 continue
@@ -112,18 +280,17 @@ def run_EnsembleSampler(pos, max_n, identifier, objective_function, objective_fu
             #############################
             # UPDATE DIAGNOSTIC FIGURES #
             #############################
-            
-            # Update autocorrelation plot
-            ax, tau = autocorrelation_plot(sampler.get_chain(), labels=objective_function.expanded_labels,
-                                            filename=fig_path+'/autocorrelation/'+identifier+'_AUTOCORR_'+run_date+'.pdf',
-                                            plt_kwargs={'linewidth':2, 'color': 'red'})
-            # Update traceplot
-            traceplot(sampler.get_chain(),labels=objective_function.expanded_labels,
-                        filename=fig_path+'/traceplots/'+identifier+'_TRACE_'+run_date+'.pdf',
-                        plt_kwargs={'linewidth':2,'color': 'red','alpha': 0.15})
-            # Garbage collection
-            plt.close('all')
-            gc.collect()
+
+            # Use the in-memory chain copy where available; every `get_chain()` call copies the full HDF5-backed chain from disk
+            chain = chain_mem[:sampler.iteration] if chain_mem is not None else sampler.get_chain()
+            # The convergence test only needs the autocorrelation time, computed with a windowed estimator (see `pySODM.optimization._acor`)
+            tau = integrated_time(chain)
+            # Rasterizing the diagnostic figures is expensive; update them only every tenth checkpoint,
+            # on the background thread. Snapshot the chain first: the in-memory buffer keeps being filled.
+            if (sampler.iteration // print_n) % 10 == 0:
+                plot_executor.submit(_render_diagnostic_figures, chain.copy(), max(1, sampler.iteration // 2000),
+                                     objective_function.expanded_labels, fig_path, identifier, run_date
+                                     ).add_done_callback(_warn_render_failure)
 
             #####################
             # CHECK CONVERGENCE #
@@ -132,16 +299,120 @@ def run_EnsembleSampler(pos, max_n, identifier, objective_function, objective_fu
             # Hardcode threshold values defining convergence
             thres_multi = 50.0
             thres_frac = 0.03
-            # Check if chain length > 50*max autocorrelation
-            converged = np.all(np.max(tau) * thres_multi < sampler.iteration)
-            # Check if average tau varied more than three percent
-            converged &= np.all(np.abs(np.mean(old_tau) - np.mean(tau)) / np.mean(tau) < thres_frac)
+            # Reduce tau once per checkpoint
+            tau_max = float(np.max(tau))
+            tau_mean = float(np.mean(tau))
+            old_mean = float(np.mean(old_tau)) if np.isfinite(old_tau).all() else np.inf
+            # Converged if chain length > 50*max autocorrelation and average tau varied less than three percent
+            converged = (tau_max * thres_multi < sampler.iteration) and (abs(old_mean - tau_mean) / tau_mean < thres_frac)
             if converged:
                 break
             old_tau = tau
+        # Render the diagnostics once more on exit, so runs shorter than `10*print_n` iterations also get their figures
+        if sampler.iteration:
+            chain = chain_mem[:sampler.iteration] if chain_mem is not None else sampler.get_chain()
+            plot_executor.submit(_render_diagnostic_figures, chain.copy(), max(1, sampler.iteration // 2000),
+                                 objective_function.expanded_labels, fig_path, identifier, run_date
+                                 ).add_done_callback(_warn_render_failure)
+    finally:
+        if pool:
+            pool.close()
+        plot_executor.shutdown(wait=True)
 
     return sampler
 
+def run_NUTS(pos, max_n, identifier, objective_function, objective_function_args=None, objective_function_kwargs=None,
+             samples_path=None, progress=True, settings_dict={}, rng_seed=0):
+    """Wrapper function to calibrate a model using `numpyro`'s gradient-based No-U-Turn sampler (NUTS) instead of `emcee`'s affine-invariant ensemble sampler.
+
+    For smooth, differentiable log-posteriors, NUTS with a JIT-compiled log-density typically outperforms parallel ensemble MCMC, at the cost of requiring
+    the objective function to be written in `jax`-compatible numpy. The chains are stored in an `.hdf5` file mimicking the layout of `emcee.backends.HDFBackend`,
+    so that `emcee_sampler_to_dictionary()` can be used downstream without modification. Requires the optional dependencies `jax` and `numpyro`.
+
+    Parameters:
+    -----------
+        pos: np.ndarray
+            Starting position of the Markov Chains. We recommend using `perturbate_theta()`.
+        max_n: int
+            Total number of iterations; the first half is used as warmup, the second half is retained as samples.
+        identifier: str
+            Identifier of the expirement.
+        objective function: callable function
+            Objective function. Must be implemented with `jax`-compatible operations so it can be differentiated and JIT-compiled.
+        objective_function_args: tuple
+            Arguments of the objective function.
+        objective_function_kwargs: dict
+            Keyworded arguments of the objective function.
+        samples_path: str
+            Location where the `.hdf5` backend should be saved.
+        progress: bool
+            Enables the progress bar.
+        settings_dict: dict
+            Dictionary containing calibration settings or other usefull settings for long-term storage. Stored as an attribute of the `.hdf5` backend. Appended to the samples dictionary generated by `emcee_sampler_to_dictionary()`.
+        rng_seed: int
+            Seed of the `jax` pseudo-random number generator.
+
+    Returns:
+    --------
+
+    mcmc: numpyro.infer.MCMC
+        Numpyro MCMC object ([see](https://num.pyro.ai/en/stable/mcmc.html)). To extract a dictionary of samples + settings, use `emcee_sampler_to_dictionary`.
+
+    """
+
+    try:
+        import jax
+        import jax.numpy as jnp
+        from numpyro.infer import MCMC, NUTS
+    except ImportError:
+        raise ImportError(
+            "The optional dependencies 'jax' and 'numpyro' are required to use `run_NUTS`. Install them or use `run_EnsembleSampler` instead."
+        )
+
+    # Set default samples_path as same directory as calibration script
+    samples_path = os.path.join(os.getcwd(), samples_path) if samples_path else os.getcwd()
+    # Make the output directory (if it doesn't exist yet)
+    os.makedirs(samples_path, exist_ok=True)
+    # Determine current date
+    run_date = str(datetime.date.today())
+    # By default, put the calibrated model parameters shapes in the settings dictionary so we can retrieve their sizes later
+    settings_dict.update({'calibrated_parameters_shapes': objective_function.parameter_shapes})
+    # Derive nwalkers, ndim from shape of pos
+    nwalkers, ndim = pos.shape
+    # Freeze the objective function arguments and flip the sign: numpyro expects a potential (negative log-posterior)
+    args = objective_function_args if objective_function_args else ()
+    kwargs = objective_function_kwargs if objective_function_kwargs else {}
+    def potential_fn(theta):
+        return -objective_function(theta, *args, **kwargs)
+
+    # Start calibration
+    print(f'\nNo-U-Turn sampling (numpyro)')
+    print(f'============================\n')
+    print(f'Using {max_n//2} warmup iterations for {ndim} parameters, in {nwalkers} chains\n')
+    sys.stdout.flush()
+
+    kernel = NUTS(potential_fn=potential_fn)
+    mcmc = MCMC(kernel, num_warmup=max_n//2, num_samples=max_n-max_n//2, num_chains=nwalkers,
+                chain_method='vectorized', progress_bar=progress)
+    mcmc.run(jax.random.PRNGKey(rng_seed), init_params=jnp.asarray(pos), extra_fields=('potential_energy',))
+
+    # Mimick the `emcee.backends.HDFBackend` layout so `emcee_sampler_to_dictionary()` works downstream
+    samples = np.swapaxes(np.asarray(mcmc.get_samples(group_by_chain=True)), 0, 1)      # --> (iteration, nwalkers, ndim)
+    log_prob = -np.swapaxes(np.asarray(mcmc.get_extra_fields(group_by_chain=True)['potential_energy']), 0, 1)
+    with h5py.File(os.path.join(samples_path, str(identifier)+'_BACKEND_'+run_date+'.hdf5'), 'w') as f:
+        f.attrs['settings_json'] = json.dumps(settings_dict)
+        g = f.create_group('mcmc')
+        g.attrs['version'] = emcee.__version__
+        g.attrs['nwalkers'] = nwalkers
+        g.attrs['ndim'] = ndim
+        g.attrs['has_blobs'] = False
+        g.attrs['iteration'] = samples.shape[0]
+        g.create_dataset('chain', data=samples, dtype=np.float64)
+        g.create_dataset('log_prob', data=log_prob, dtype=np.float64)
+        g.create_dataset('accepted', data=np.zeros(nwalkers), dtype=np.float64)
+
+    return mcmc
+
 def perturbate_theta(theta, pert, multiplier=2, bounds=None, verbose=None):
     """ A function to perturbate a PSO estimate and construct a matrix with initial positions for the MCMC chains
 
@@ -184,52 +455,59 @@ def perturbate_theta(theta, pert, multiplier=2, bounds=None, verbose=None):
         raise Exception('The parameter value array "theta" must have the same length as the perturbation value array "pert".')
     if bounds and (len(bounds) != len(theta)):
         raise Exception('If bounds is not None, it must contain a tuple for every parameter in theta')
-    # Convert theta to np.array
-    theta = np.array(theta)
+    # Convert theta and pert to np.array (copy theta: it is clipped in-place below)
+    theta = np.array(theta, dtype=np.float64)
+    pert = np.asarray(pert, dtype=np.float64)
     # Define clipping values: perturbed value must not fall outside this range
-    if bounds:
-        lower_bounds = [bounds[i][0]/(1-pert[i]) for i in range(len(bounds))]
-        upper_bounds = [bounds[i][1]/(1+pert[i]) for i in range(len(bounds))]
-    
+    if bounds is not None:
+        b = np.asarray(bounds, dtype=np.float64)
+        lower_bounds = b[:,0] / (1.0 - pert)
+        upper_bounds = b[:,1] / (1.0 + pert)
+
     ndim = len(theta)
     nwalkers = ndim*multiplier
-    cond_number=np.inf
+    degenerate=True
     retry_counter=0
-    while cond_number == np.inf:
-        if bounds and (retry_counter==0):
-            theta = np.clip(theta, lower_bounds, upper_bounds)
+    while degenerate:
+        if (bounds is not None) and (retry_counter==0):
+            np.clip(theta, lower_bounds, upper_bounds, out=theta)
         pos = theta + theta*pert*np.random.uniform(low=-1,high=1,size=(nwalkers,ndim))
-        cond_number = np.linalg.cond(pos)
-        if ((cond_number == np.inf) and verbose and (retry_counter<20)):
-            print("Condition number too high, recalculating perturbations. Perhaps one or more of the bounds is zero?")
+        # We only need to know the walkers are linearly independent; a QR-based rank check of the first ndim
+        # walkers is much cheaper than the full SVD behind `np.linalg.cond`
+        R = np.linalg.qr(pos[:ndim], mode='r')
+        degenerate = bool(np.any(np.abs(np.diag(R)) <= 1e-12*np.max(np.abs(pos))))
+        if (degenerate and verbose and (retry_counter<20)):
+            print("Walker positions are linearly dependent, recalculating perturbations. Perhaps one or more of the bounds is zero?")
             sys.stdout.flush()
             retry_counter += 1
         elif retry_counter >= 20:
-            raise Exception("Attempted 20 times to perturb parameter values but the condition number remains too large.")
+            raise Exception("Attempted 20 times to perturb parameter values but the walker positions remain linearly dependent.")
     if verbose:
         print('Total number of markov chains: ' + str(nwalkers)+'\n')
         sys.stdout.flush()
     return ndim, nwalkers, pos
 
-def emcee_sampler_to_dictionary(samples_path, identifier, discard=0, thin=1, run_date=str(datetime.date.today())):
+def emcee_sampler_to_dictionary(samples_path, identifier, discard=0, thin=1, run_date=None):
     """
     A function to discard and thin the samples available in the sampler object and subsequently convert them to a dictionary of format: {parameter_name: [sample_0, ..., sample_n]}.
     Append a dictionary of settings (f.i. starting estimate of MCMC sampler, start- and enddate of calibration).
     """
 
+    # A default argument would be evaluated at import time, freezing the date; resolve it at call time instead
+    if run_date is None:
+        run_date = str(datetime.date.today())
+
     ###############################
     ## Load sampler and settings ##
     ###############################
 
-    import json
+    # Load settings from the backend's file attributes
+    filename = os.path.join(os.getcwd(), samples_path, str(identifier)+'_BACKEND_'+run_date+'.hdf5')
+    with h5py.File(filename, 'r') as f:
+        settings = json.loads(f.attrs['settings_json'])
 
-    # Load settings
-    with open(os.path.join(os.getcwd(), samples_path+str(identifier)+'_SETTINGS_'+run_date+'.json'), 'r') as f:
-        settings = json.load(f)
-
-    # Load sampler 
-    filename =  samples_path+'/'+str(identifier)+'_BACKEND_'+run_date+'.hdf5'
-    sampler = emcee.backends.HDFBackend(os.path.join(os.getcwd(), filename))
+    # Load sampler
+    sampler = emcee.backends.HDFBackend(filename)
 
     ####################
     # Discard and thin #
@@ -251,31 +529,32 @@ def emcee_sampler_to_dictionary(samples_path, identifier, discard=0, thin=1, run
 
     flat_samples = sampler.get_chain(discard=discard,thin=thin,flat=True)
     samples_dict = {}
-    count=0
-    for name,value in settings['calibrated_parameters_shapes'].items():
+    # Split the flattened chain into one chunk of columns per calibrated parameter
+    sizes = [int(np.prod(value)) for value in settings['calibrated_parameters_shapes'].values()]
+    chunks = np.split(flat_samples, np.cumsum(sizes)[:-1], axis=1)
+    for (name,value),chunk in zip(settings['calibrated_parameters_shapes'].items(), chunks):
         if value != [1]:
-            vals=[]
-            for j in range(np.prod(value)):
-                vals.append(list(flat_samples[:, count+j]))
-            count += np.prod(value)
-            samples_dict[name] = vals
+            # orjson serializes (C-contiguous) ndarrays directly; only convert to lists for the stdlib encoder
+            samples_dict[name] = np.ascontiguousarray(chunk.T) if orjson else chunk.T.tolist()
         else:
-            samples_dict[name] = list(flat_samples[:, count])
-            count += 1
+            samples_dict[name] = np.ascontiguousarray(chunk[:,0]) if orjson else chunk[:,0].tolist()
 
     # Remove calibrated parameters from the settings
     del settings['calibrated_parameters_shapes']
     # Append settings to samples dictionary
     samples_dict.update(settings)
-    # Remove settings .json
-    os.remove(os.path.join(os.getcwd(), samples_path+str(identifier)+'_SETTINGS_'+run_date+'.json'))
 
     ###############
     # Save result #
     ###############
 
     # Save setings dictionary to samples_path
-    with open(os.path.join(os.getcwd(),samples_path+str(identifier)+'_SAMPLES_'+run_date+'.json'), 'w') as file:
-        json.dump(samples_dict, file)
+    samples_filename = os.path.join(os.getcwd(), samples_path, str(identifier)+'_SAMPLES_'+run_date+'.json')
+    if orjson:
+        with open(samples_filename, 'wb') as file:
+            file.write(orjson.dumps(samples_dict, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(samples_filename, 'w') as file:
+            json.dump(samples_dict, file)
 
     return samples_dict
\ No newline at end of file
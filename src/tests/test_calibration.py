@@ -1,4 +1,5 @@
 import pytest
+import emcee
 import datetime
 import pandas as pd
 import numpy as np
@@ -8,6 +9,7 @@ from pySODM.optimization import pso, nelder_mead
 from pySODM.optimization.utils import add_negative_binomial_noise
 from pySODM.optimization.objective_functions import log_posterior_probability, ll_poisson, ll_negative_binomial
 from pySODM.optimization.mcmc import perturbate_theta, run_EnsembleSampler, emcee_sampler_to_dictionary
+from pySODM.optimization._acor import integrated_time
 
 # Only tested for ODEModel but the model output is identical so this shouldn't matter
 
@@ -730,4 +732,25 @@ def test_SIR_SI():
     # Vector population --> calibrate to unstratified data
     data=[df.groupby(by=['time','age_groups']).sum(), df.groupby(by=['time']).sum()]
     # Correct use
-    objective_function = log_posterior_probability(model,pars,bounds,data,states,log_likelihood_fnc,log_likelihood_fnc_args,weights,labels=labels,)
\ No newline at end of file
+    objective_function = log_posterior_probability(model,pars,bounds,data,states,log_likelihood_fnc,log_likelihood_fnc_args,weights,labels=labels,)
+
+def test_integrated_time():
+
+    # The autocorrelation time of an AR(1) process x_t = rho*x_{t-1} + e_t is known analytically: (1+rho)/(1-rho)
+    rho = 0.9
+    iterations, nwalkers, ndim = 20000, 8, 2
+    rng = np.random.default_rng(0)
+    chain = np.zeros((iterations, nwalkers, ndim))
+    for i in range(1, iterations):
+        chain[i] = rho*chain[i-1] + rng.standard_normal((nwalkers, ndim))
+    tau = integrated_time(chain)
+    assert np.allclose(tau, (1+rho)/(1-rho), rtol=0.2)
+
+    # The windowed estimator and emcee's FFT-based fallback must agree
+    assert np.allclose(tau, emcee.autocorr.integrated_time(chain, tol=0, quiet=True), rtol=0.2)
+
+    # A constant chain carries no autocorrelation information; the estimate is floored at one step
+    assert np.all(integrated_time(np.ones((50, 4, 2))) == 1.0)
+
+    # Chains too short to estimate an autocorrelation must not return tau <= 0 (it feeds a relative-change convergence test)
+    assert np.all(integrated_time(rng.standard_normal((2, 4, 2))) >= 1.0)